@@ -1,166 +1,246 @@
 import os
 import re
+import sys
+import mmap
+import multiprocessing
 from pathlib import Path
 import json
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 
-def extract_routes_from_js(file_path, base_dir):
-    """从单个JS文件中提取路由信息"""
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时退回标准库 json
+    orjson = None
 
-    routes = []
-    
-    # Vue Router 路由模式
-    vue_patterns = [
-        # 基础路由定义
-        r'path:\s*[\'\"](.*?)[\'\"]',
-        # 命名路由
-        r'name:\s*[\'\"](.*?)[\'"].*?path:\s*[\'\"](.*?)[\'"]',
-        # 动态路由
-        r'path:\s*[\'"](.*?/:\w+.*?)[\'"]*'
-    ]
-
-    # React Router 路由模式
-    react_patterns = [
-        # Route组件路径
-        r'<Route\s+path=[\'"](.*?)[\'"]\s*',
-        # useNavigate/history.push
-        r'(?:useNavigate|history\.push)\([\'\"](.*?)[\'\"]\)',
-        # Link组件
-        r'<Link\s+to=[\'"](.*?)[\'"]\s*'
-    ]
-
-    # 通用URL模式
-    general_patterns = [
-        # API endpoints
-        r'(?:url|endpoint|api):\s*[\'"](/[^\'"]*?)[\'"]\s*',
-        # axios/fetch请求
-        r'(?:axios|fetch)\([\'\"]((?:/|https?://)[^\'\"]*?)[\'\"]',
-        # 普通URL路径
-        r'[\'"](/[\w\-./]+?)[\'"]'
-    ]
-
-    def is_valid_route(route_path):
-        """检查路由路径是否有效"""
-        # 过滤掉无效路径
-        invalid_paths = {'/', '//', '.', './'}  
-        if route_path in invalid_paths:
-            return False
-            
-        # 检查路径是否只包含斜杠或点
-        if all(c in './\\' for c in route_path):
-            return False
-            
-        # 过滤掉静态资源文件路径
-        static_extensions = [
-            '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',  # 图片
-            '.css', '.scss', '.less',  # 样式
-            '.js', '.jsx', '.ts', '.tsx',  # 脚本文件
-            '.woff', '.woff2', '.ttf', '.eot', '.otf',  # 字体
-            '.mp3', '.mp4', '.avi', '.mov', '.flv', '.wmv',  # 媒体
-        ]
-        
-        # 检查路径是否以静态资源扩展名结尾
-        for ext in static_extensions:
-            if route_path.lower().endswith(ext):
-                return False
-                
-        # 检查路径是否包含文件名模式（带扩展名的文件）
-        if re.search(r'/[^/]+\.[a-zA-Z0-9]{2,6}(?:\?.*)?$', route_path):
-            return False
-            
-        return True
+# Vue Router 路由模式
+VUE_PATTERNS = tuple(re.compile(p) for p in (
+    # 基础路由定义
+    rb'path:\s*[\'\"](.*?)[\'\"]',
+    # 命名路由
+    rb'name:\s*[\'\"](.*?)[\'"].*?path:\s*[\'\"](.*?)[\'"]',
+    # 动态路由
+    rb'path:\s*[\'"](.*?/:\w+.*?)[\'"]*'
+))
 
-    # 计算相对路径
-    relative_path = os.path.relpath(file_path, base_dir)
+# React Router 路由模式
+REACT_PATTERNS = tuple(re.compile(p) for p in (
+    # Route组件路径
+    rb'<Route\s+path=[\'"](.*?)[\'"]\s*',
+    # useNavigate/history.push
+    rb'(?:useNavigate|history\.push)\([\'\"](.*?)[\'\"]\)',
+    # Link组件
+    rb'<Link\s+to=[\'"](.*?)[\'"]\s*'
+))
+
+# 通用URL模式
+GENERAL_PATTERNS = tuple(re.compile(p) for p in (
+    # API endpoints
+    rb'(?:url|endpoint|api):\s*[\'"](/[^\'"]*?)[\'"]\s*',
+    # axios/fetch请求
+    rb'(?:axios|fetch)\([\'\"]((?:/|https?://)[^\'\"]*?)[\'\"]',
+    # 普通URL路径（\x80-\xff 用于匹配UTF-8编码的非ASCII字符）
+    rb'[\'"](/[\w\-./\x80-\xff]+?)[\'"]'
+))
+
+# 路由类型及其模式，按提取顺序排列。
+# 每个模式单独扫描：不同模式的匹配可能重叠（如命名路由会跨越其间的其他路由），
+# 合并成一个交替正则后 finditer 不返回重叠匹配，会互相吞掉路由
+ROUTE_PATTERNS = (
+    ('Vue路由', VUE_PATTERNS),
+    ('React路由', REACT_PATTERNS),
+    ('通用路由', GENERAL_PATTERNS),
+)
+
+# 普通URL路径模式在字节上用 \x80-\xff 匹配非ASCII字符，会连中文标点等非单词字符一起接受，
+# 解码后再按原来的字符串模式复核捕获到的路径
+_PLAIN_PATH_PATTERN = GENERAL_PATTERNS[-1]
+_PLAIN_PATH_RE = re.compile(r'/[\w\-./]+')
+
+# 用于删除斜杠和点的转换表
+_SLASHDOT_TBL = str.maketrans('', '', './\\')
+
+# 静态资源文件扩展名
+_STATIC_EXTS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp',  # 图片
+    '.css', '.scss', '.less',  # 样式
+    '.js', '.jsx', '.ts', '.tsx',  # 脚本文件
+    '.woff', '.woff2', '.ttf', '.eot', '.otf',  # 字体
+    '.mp3', '.mp4', '.avi', '.mov', '.flv', '.wmv',  # 媒体
+)
+
+# 以静态资源扩展名结尾（不区分大小写）或包含文件名模式（带扩展名的文件）的路径，
+# 在导入时生成为一个正则，每个候选路由只需匹配一次
+_EXT_RE = re.compile(
+    r'(?i:\.(?:' + '|'.join(re.escape(ext[1:]) for ext in _STATIC_EXTS) + r'))\Z'
+    r'|/[^/]+\.[a-zA-Z0-9]{2,6}(?:\?.*)?$'
+)
+# 连续的斜杠
+SLASH_RE = re.compile(r'/+')
+
+# 遍历JS文件时跳过的目录（第三方依赖、测试覆盖率报告）；.git、.cache 等隐藏目录另行跳过
+_EXCLUDE_DIRS = {'node_modules', 'coverage'}
+
+# 文件数少于该值时直接在当前进程中提取，启动进程池的开销大于并行带来的收益
+_POOL_MIN_FILES = 16
+
+def is_valid_route(route_path):
+    """检查路由路径是否有效"""
+    # 过滤掉无效路径
+    invalid_paths = {'/', '//', '.', './'}  
+    if route_path in invalid_paths:
+        return False
+        
+    # 检查路径是否只包含斜杠或点
+    if not route_path.translate(_SLASHDOT_TBL):
+        return False
+        
+    # 检查路径是否以静态资源扩展名结尾，或包含文件名模式（带扩展名的文件）
+    if _EXT_RE.search(route_path):
+        return False
+        
+    return True
 
-    def extract_with_patterns(patterns, route_type):
+def extract_routes_from_js_bytes(content, source_file):
+    """从JS内容（bytes或mmap）中提取路由信息，source_file 为记录在路由中的来源文件"""
+    routes = []
+    for route_type, patterns in ROUTE_PATTERNS:
         for pattern in patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                if len(match.groups()) > 1:  # 处理命名路由
-                    route_name, route_path = match.group(1), match.group(2)
+            for match in pattern.finditer(content):
+                # 在字节上匹配，只解码捕获到的路径
+                captures = [group.decode('utf-8', 'ignore') for group in match.groups()]
+                if len(captures) > 1:  # 处理命名路由
+                    route_name, route_path = captures
                     if is_valid_route(route_path):
                         routes.append({
                             'type': route_type,
                             'name': route_name,
                             'path': route_path,
-                            'source_file': relative_path.replace('\\', '/')  # 使用相对路径并统一使用正斜杠
+                            'source_file': source_file
                         })
                 else:
-                    route_path = match.group(1)
+                    route_path = captures[0]
+                    if pattern is _PLAIN_PATH_PATTERN and not _PLAIN_PATH_RE.fullmatch(route_path):
+                        continue
                     if route_path and not route_path.startswith(('http://', 'https://', 'ws://', 'wss://')) and is_valid_route(route_path):
                         routes.append({
                             'type': route_type,
                             'path': route_path,
-                            'source_file': relative_path.replace('\\', '/')  # 使用相对路径并统一使用正斜杠
+                            'source_file': source_file
                         })
 
-    extract_with_patterns(vue_patterns, 'Vue路由')
-    extract_with_patterns(react_patterns, 'React路由')
-    extract_with_patterns(general_patterns, '通用路由')
-
     return routes
 
+def extract_routes_from_js(file_path, base_dir):
+    """从单个JS文件中提取路由信息"""
+    # 计算相对路径
+    relative_path = os.path.relpath(file_path, base_dir)
+    source_file = relative_path.replace('\\', '/')  # 使用相对路径并统一使用正斜杠
+
+    with open(file_path, 'rb') as f:
+        # 空文件无法映射，也不可能包含路由
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        # 直接在映射的字节上匹配，避免读取并解码整个文件
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            # 各模式依次从头到尾顺序扫描，提示内核加大预读，减少缺页带来的零散读盘（仅部分平台支持）
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                content.madvise(mmap.MADV_SEQUENTIAL)
+            return extract_routes_from_js_bytes(content, source_file)
+
+def _extract_one(js_file, directory, base_dir):
+    """进程池工作函数：提取单个JS文件的路由，返回 (相对路径, 路由列表)"""
+    # 使用相对于目录的路径作为键
+    relative_path = os.path.relpath(js_file, directory)
+    try:
+        return relative_path, extract_routes_from_js(js_file, base_dir)
+    except Exception as e:
+        # 输出到stderr：作为MCP服务运行时stdout是JSON-RPC通道
+        print(f"❌ 处理文件失败 {js_file}: {str(e)}", file=sys.stderr)
+        return relative_path, []
+
+def _iter_js_files(root):
+    """遍历目录下的JS文件路径，跳过依赖、缓存等无关目录、隐藏目录以及符号链接目录"""
+    stack = [root]
+    while stack:
+        # 与 Path.rglob 一致，静默跳过无法读取的目录
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _EXCLUDE_DIRS and not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name.endswith('.js') and entry.is_file():
+                    yield entry.path
+
 def process_js_files(directory):
     """处理目录下的所有JS文件"""
     all_routes = defaultdict(list)
-    js_files = Path(directory).rglob('*.js')
+    js_files = list(_iter_js_files(directory))
     base_dir = Path(directory).parent  # 使用父目录作为基准目录，这样相对路径会包含当前目录名
 
-    for js_file in js_files:
-        try:
-            routes = extract_routes_from_js(js_file, base_dir)
-            if routes:
-                # 使用相对于目录的路径作为键
-                relative_path = os.path.relpath(js_file, directory)
-                all_routes[relative_path].extend(routes)
-        except Exception as e:
-            print(f"❌ 处理文件失败 {js_file}: {str(e)}")
+    # 正则匹配是纯CPU工作，文件较多时按文件分发到多个进程并行处理。
+    # 显式使用 spawn 启动子进程：MCP服务运行在多线程的事件循环中，fork 可能复制到被其他线程持有的锁
+    worker = partial(_extract_one, directory=directory, base_dir=base_dir)
+    if len(js_files) < _POOL_MIN_FILES:
+        results = list(map(worker, js_files))
+    else:
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(worker, js_files, chunksize=8))
+
+    for relative_path, routes in results:
+        if routes:
+            all_routes[relative_path].extend(routes)
 
     return all_routes
 
+@lru_cache(maxsize=65536)
+def normalize_path(path):
+    """规范化路由路径，移除多余的斜杠和点"""
+    # 移除连续的斜杠
+    path = SLASH_RE.sub('/', path)
+    # 移除末尾的斜杠（除非路径只有一个斜杠）
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    return path
+
 def save_routes_to_file(routes, output_file):
     """将提取的路由信息保存到文件，并进行去重处理"""
-    # 使用字典存储唯一路由，键为规范化后的路由路径
+    # 使用字典存储唯一路由，键为规范化后的路由路径；来源文件单独用集合收集，最后再拼接
     unique_routes = {}
-    
-    def normalize_path(path):
-        """规范化路由路径，移除多余的斜杠和点"""
-        # 移除连续的斜杠
-        path = re.sub(r'/+', '/', path)
-        # 移除末尾的斜杠（除非路径只有一个斜杠）
-        if len(path) > 1 and path.endswith('/'):
-            path = path.rstrip('/')
-        return path
+    sources = {}
 
     # 遍历所有路由并合并相同路径的路由信息
     for file_routes in routes.values():
         for route in file_routes:
             path = normalize_path(route['path'])
             route['path'] = path  # 更新为规范化后的路径
-            
+            sources.setdefault(path, set()).add(route['source_file'])
+
             if path not in unique_routes:
                 unique_routes[path] = route
-            else:
-                # 如果路由已存在且来源文件不同，则更新来源文件信息
-                existing_sources = set(unique_routes[path]['source_file'].split(', '))
-                new_source = route['source_file']
-                if new_source not in existing_sources:
-                    existing_sources.add(new_source)
-                    unique_routes[path]['source_file'] = ', '.join(sorted(existing_sources))
-                
-                # 如果新路由有名称而现有路由没有，则更新名称
-                if 'name' in route and ('name' not in unique_routes[path] or not unique_routes[path]['name']):
-                    unique_routes[path]['name'] = route['name']
+            # 如果新路由有名称而现有路由没有，则更新名称
+            elif 'name' in route and not unique_routes[path].get('name'):
+                unique_routes[path]['name'] = route['name']
+
+    # 合并所有来源文件信息
+    for path, route in unique_routes.items():
+        route['source_file'] = ', '.join(sorted(sources[path]))
     
     # 将字典转换为列表并按路径排序
     final_routes = sorted(unique_routes.values(), key=lambda x: x['path'])
     
     # 保存到文件，使用缩进格式化
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_routes, f, ensure_ascii=False, indent=2, sort_keys=True)
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(final_routes, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(final_routes, f, ensure_ascii=False, indent=2, sort_keys=True)
 
 def main():
     import argparse
@@ -1,30 +1,107 @@
 import os
+import re
+import codecs
+import mmap
+import shutil
+import subprocess
 import requests
+from requests.adapters import HTTPAdapter
 import argparse
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from time import sleep
 from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from threading import Event, Lock
 from tqdm import tqdm
-import jsbeautifier
+
+# 页面/脚本中引用其他JS文件的方式：src/href属性、import、require、loadScript
+_JS_URL_RE = re.compile(
+    rb'''(?:src|href)=["']([^"']*?\.js)["']'''
+    rb'''|import.*?["']([^"']*?\.js)["']'''
+    rb'''|require\(["']([^"']*?\.js)["']'''
+    rb'''|loadScript\(["']([^"']*?\.js)["']'''
+)
+
+def extract_js_urls_from_content(content, base_url):
+    """从JS内容（bytes或mmap）中提取引用的其他JS文件URL"""
+    js_urls = set()
+    for match in _JS_URL_RE.finditer(content):
+        match_url = next(filter(None, match.groups())).decode('utf-8', 'ignore')
+        js_urls.add(urljoin(base_url, match_url))
+    return js_urls
+
+def extract_js_urls_from_file(file_path, base_url):
+    """通过内存映射读取已下载的JS文件并提取引用的JS文件URL"""
+    with open(file_path, 'rb') as f:
+        # 空文件无法映射
+        if os.fstat(f.fileno()).st_size == 0:
+            return set()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return extract_js_urls_from_content(content, base_url)
+
+def format_with_native(content):
+    """使用原生格式化工具（deno fmt / prettier）格式化JS代码，工具不可用或失败时返回None"""
+    if deno := shutil.which('deno'):
+        cmd = [deno, 'fmt', '--ext=js', '-']
+    elif prettier := shutil.which('prettier'):
+        cmd = [prettier, '--stdin-filepath', 'index.js']
+    else:
+        return None
+
+    try:
+        result = subprocess.run(cmd, input=content, capture_output=True,
+                                text=True, encoding='utf-8', timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+def decode_js(data, encoding=None):
+    """解码JS文件内容：优先按UTF-8解码，失败时使用响应声明的编码，仍无法解码的字节以替换字符代替"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+    try:
+        return data.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:  # 响应声明了未知的编码
+        return data.decode('utf-8', errors='replace')
+
+def is_utf8_chunk(decoder, chunk, final=False):
+    """用增量解码器校验一段字节是否为合法UTF-8，多字节字符可以跨越前后两段"""
+    try:
+        decoder.decode(chunk, final)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def transcode_js_file(file_path, encoding=None):
+    """将非UTF-8的JS文件按响应声明的编码解码，并以UTF-8写回"""
+    with open(file_path, 'rb') as f:
+        content = decode_js(f.read(), encoding)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
 
 def format_js_file(file_path):
     """格式化单个JS文件"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             content = f.read()
 
-        # 配置格式化选项
-        opts = jsbeautifier.default_options()
-        opts.indent_size = 2
-        opts.space_in_empty_paren = True
-        opts.preserve_newlines = True
-        opts.max_preserve_newlines = 2
-        opts.wrap_line_length = 0
+        # 优先使用原生格式化工具，不可用时退回jsbeautifier
+        formatted = format_with_native(content)
+        if formatted is None:
+            import jsbeautifier
 
-        # 格式化JS代码
-        formatted = jsbeautifier.beautify(content, opts)
+            # 配置格式化选项
+            opts = jsbeautifier.default_options()
+            opts.indent_size = 2
+            opts.space_in_empty_paren = True
+            opts.preserve_newlines = True
+            opts.max_preserve_newlines = 2
+            opts.wrap_line_length = 0
+
+            # 格式化JS代码
+            formatted = jsbeautifier.beautify(content, opts)
 
         # 写回文件
         with open(file_path, 'w', encoding='utf-8') as f:
@@ -35,28 +112,21 @@ def format_js_file(file_path):
         print(f"[ERROR] 格式化失败 {file_path}: {str(e)}")
         return False
 
-def get_js_files(base_url, retry=3, max_depth=5):
+def get_js_files(base_url, retry=3, max_depth=5, format_js=False):
+    """下载页面引用的所有JS文件；format_js 为 True 时格式化下载的文件"""
+    # 本次调用的所有下载共享同一个会话，通过连接池复用TCP/TLS连接；
+    # 会话在调用结束时关闭，Cookie等状态不会带到下一次调用
+    with requests.Session() as session:
+        session.mount('https://', HTTPAdapter(pool_connections=64, pool_maxsize=256))
+        session.mount('http://', HTTPAdapter(pool_connections=64, pool_maxsize=256))
+        return _get_js_files(session, base_url, retry, max_depth, format_js)
+
+def _get_js_files(session, base_url, retry, max_depth, format_js):
     downloaded_urls = set()
     url_lock = Lock()
     parsed_url = urlparse(base_url)
     save_dir = os.path.join('.', parsed_url.netloc)
     
-    def extract_js_urls_from_content(content, base_url):
-        import re
-        patterns = [
-            r'(?:src|href)=["\']([^"\']*?\.js)["\']',
-            r'import.*?["\']([^"\']*?\.js)["\']',
-            r'require\(["\']([^"\']*?\.js)["\']',
-            r'loadScript\(["\']([^"\']*?\.js)["\']'
-        ]
-        js_urls = set()
-        for pattern in patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                full_url = urljoin(base_url, match)
-                js_urls.add(full_url)
-        return js_urls
-
     def download_js_recursive(url, current_depth=1, pbar=None):
         with url_lock:
             if current_depth > max_depth or url in downloaded_urls:
@@ -71,7 +141,7 @@ def get_js_files(base_url, retry=3, max_depth=5):
     }
 
     try:
-        response = requests.get(base_url, headers=headers, timeout=10)
+        response = session.get(base_url, headers=headers, timeout=10)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
     except requests.exceptions.RequestException as e:
@@ -94,35 +164,48 @@ def get_js_files(base_url, retry=3, max_depth=5):
         path_segments = parsed.path.strip('/').split('/')
         filename = path_segments[-1] or 'index.js'
         local_path = os.path.join(save_dir, *path_segments)
+        # 先写入临时文件，下载完整后再重命名，避免中断时留下截断的JS文件
+        part_path = local_path + '.part'
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
 
-        session = requests.Session()
         for attempt in range(retry):
             try:
-                js_response = session.get(js_url, headers=headers, timeout=10)
-                js_response.raise_for_status()
-                js_content = js_response.text
-                
-                with open(local_path, 'w', encoding='utf-8') as f:
-                    f.write(js_content)
+                # 以流式方式直接写入磁盘，避免在内存中保存整个文件内容
+                with session.get(js_url, headers=headers, timeout=10, stream=True) as js_response:
+                    js_response.raise_for_status()
+                    # 写入的同时校验内容是否为UTF-8
+                    utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+                    is_utf8 = True
+                    with open(part_path, 'wb') as f:
+                        for chunk in js_response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                            is_utf8 = is_utf8 and is_utf8_chunk(utf8_decoder, chunk)
+                    is_utf8 = is_utf8 and is_utf8_chunk(utf8_decoder, b'', final=True)
+
+                    # 非UTF-8内容按响应声明的编码转码，保存的文件统一为UTF-8
+                    if not is_utf8:
+                        transcode_js_file(part_path, js_response.encoding)
+                os.replace(part_path, local_path)
+
+                # 在格式化改写文件之前，从原始内容中提取引用的JS文件
+                new_js_urls = extract_js_urls_from_file(local_path, js_url)
 
                 # 格式化下载的JS文件
-                if format_js_file(local_path):
+                if format_js and format_js_file(local_path):
                     print(f"[SUCCESS] 已格式化: {local_path}")
 
                 if pbar:
                     pbar.update(1)
 
-                new_js_urls = extract_js_urls_from_content(js_content, js_url)
-                if new_js_urls:
-                    with ThreadPoolExecutor(max_workers=5) as inner_executor:
-                        futures = [inner_executor.submit(download_js_recursive, new_url, depth + 1, None)
-                                  for new_url in new_js_urls if new_url not in downloaded_urls]
-                        for future in futures:
-                            future.result()
+                # 新发现的JS文件提交回同一个线程池，无需等待其下载完成
+                for new_url in new_js_urls:
+                    if new_url not in downloaded_urls:
+                        submit(download_js_recursive, new_url, depth + 1, None)
 
                 return os.path.relpath(local_path, '.')
             except Exception as e:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
                 if attempt < retry - 1:
                     sleep(1)
                 else:
@@ -130,24 +213,53 @@ def get_js_files(base_url, retry=3, max_depth=5):
                     if pbar:
                         pbar.update(1)
                     return None
-            finally:
-                session.close()
 
     all_downloaded = []
     results_lock = Lock()
 
+    # 所有下载任务（包括递归发现的）共用一个线程池，pending 为尚未完成的任务数。
+    # 主线程提交初始任务期间先占用一个计数，避免任务提前全部完成时被误判为结束
+    executor = ThreadPoolExecutor(max_workers=20)
+    pending = 1
+    pending_lock = Lock()
+    all_done = Event()
+
+    def task_done():
+        nonlocal pending
+        with pending_lock:
+            pending -= 1
+            if pending == 0:
+                all_done.set()
+
+    def submit(fn, *args):
+        nonlocal pending
+        with pending_lock:
+            pending += 1
+
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[ERROR] 下载任务异常: {str(e)}")
+            finally:
+                task_done()
+
+        executor.submit(run)
+
     def download_worker(js_url, pbar):
         if downloaded_file := download_js_recursive(js_url, 1, pbar):
             with results_lock:
                 all_downloaded.append(downloaded_file)
 
     with tqdm(total=len(js_urls), desc="下载进度", ncols=80) as pbar:
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            futures = [executor.submit(download_worker, url, pbar) for url in js_urls]
-            for future in futures:
-                future.result()
+        for url in js_urls:
+            submit(download_worker, url, pbar)
+        task_done()
+        all_done.wait()
+        executor.shutdown()
 
-    print(f"下载完成！共成功下载并格式化 {len(all_downloaded)} 个文件到 {save_dir}")
+    action = '下载并格式化' if format_js else '下载'
+    print(f"下载完成！共成功{action} {len(all_downloaded)} 个文件到 {save_dir}")
     return all_downloaded
 
 def main():
@@ -155,9 +267,10 @@ def main():
     parser.add_argument('url', help='目标网站URL (需包含协议，如https://)')
     parser.add_argument('--retry', type=int, default=2, help='下载失败重试次数（默认2次）')
     parser.add_argument('--depth', type=int, default=5, help='JS文件递归下载的最大深度（默认3层）')
+    parser.add_argument('--no-format', action='store_true', help='不格式化下载的JS文件')
     args = parser.parse_args()
 
-    downloaded_files = get_js_files(args.url, args.retry, args.depth)
+    downloaded_files = get_js_files(args.url, args.retry, args.depth, format_js=not args.no_format)
     
     if downloaded_files:
         parsed_url = urlparse(args.url)
@@ -1,5 +1,3 @@
-import json
-import re
 from urllib.parse import urlparse
 from datetime import datetime
 from pathlib import Path
@@ -9,7 +7,7 @@ from getjs import get_js_files
 # 导入extract_routes模块的功能
 from extract_routes import process_js_files, save_routes_to_file
 # 导入test_routes模块的功能
-from test_routes import load_routes, test_route, analyze_results
+from test_routes import load_routes, run_route_tests, analyze_results, save_results
 
 # 初始化 MCP 服务
 mcp = FastMCP("JS 路由提取与测试")
@@ -26,7 +24,7 @@ def get_js(url: str) -> str:
     parsed_url = urlparse(url)
     try:
         # 直接调用get_js_files函数
-        downloaded_files = get_js_files(url)
+        downloaded_files = get_js_files(url, format_js=True)
         
         # 构建返回结果
         if downloaded_files:
@@ -91,7 +89,7 @@ def extract_routes(directory: str, output_file: str = None) -> str:
         return f"提取路由时发生错误: {str(e)}"
 
 @mcp.tool()
-def test_routes(base_url: str, routes_file: str) -> str:
+async def test_routes(base_url: str, routes_file: str) -> str:
     """
     测试从JS文件中提取的路由是否可访问
     参数：
@@ -118,25 +116,14 @@ def test_routes(base_url: str, routes_file: str) -> str:
             return "路由文件中没有找到有效路径"
             
         # 测试所有路径
-        results = []
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        from tqdm import tqdm
-        
-        with tqdm(total=len(all_paths), desc="测试进度", ncols=80) as pbar:
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                future_to_path = {executor.submit(test_route, base_url, path): path for path in all_paths}
-                for future in as_completed(future_to_path):
-                    result = future.result()
-                    results.append(result)
-                    pbar.update(1)
+        results = await run_route_tests(base_url, all_paths)
         
         # 分析结果
         unique_pages, non_404_pages = analyze_results(results)
         
         # 保存完整测试结果到文件
         output_file = Path(routes_file).parent / "route_test_results.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        save_results(results, output_file)
             
         # 构建返回结果
         result = f"测试完成！共测试 {len(all_paths)} 个路由，结果已保存到: {output_file}\n\n"
@@ -166,6 +153,17 @@ def test_routes(base_url: str, routes_file: str) -> str:
     except Exception as e:
         return f"测试路由时发生错误: {str(e)}"
 
+def find_all(text, sub):
+    """返回子串在文本中所有不重叠出现的位置，空子串视为没有匹配"""
+    positions = []
+    if not sub:
+        return positions
+    start = text.find(sub)
+    while start != -1:
+        positions.append(start)
+        start = text.find(sub, start + len(sub))
+    return positions
+
 @mcp.tool()
 def read_route_source(routes_file: str, route_path: str, context_lines: int = 20) -> str:
     """
@@ -185,8 +183,7 @@ def read_route_source(routes_file: str, route_path: str, context_lines: int = 20
             return f"错误: 路由文件不存在 {routes_file}"
         
         # 加载路由信息
-        with open(routes_file_path, 'r', encoding='utf-8') as f:
-            routes_data = json.load(f)
+        routes_data = load_routes(routes_file_path)
         
         # 查找匹配的路由
         matching_routes = [route for route in routes_data if route.get('path') == route_path]
@@ -222,8 +219,7 @@ def read_route_source(routes_file: str, route_path: str, context_lines: int = 20
                         js_content = f.read()
                     
                     # 查找路由在JS文件中的位置
-                    route_pattern = re.escape(route_path)
-                    matches = list(re.finditer(route_pattern, js_content))
+                    matches = find_all(js_content, route_path)
                     
                     if not matches:
                         result += f"在文件 {js_file_path.name} 中未找到路由 {route_path} 的精确匹配\n"
@@ -231,7 +227,7 @@ def read_route_source(routes_file: str, route_path: str, context_lines: int = 20
                         route_parts = route_path.split('/')
                         if len(route_parts) > 1:
                             last_part = route_parts[-1]
-                            matches = list(re.finditer(re.escape(last_part), js_content))
+                            matches = find_all(js_content, last_part)
                             if matches:
                                 result += f"但找到了路由的最后部分 '{last_part}' 的匹配\n"
                             else:
@@ -246,9 +242,9 @@ def read_route_source(routes_file: str, route_path: str, context_lines: int = 20
                     total_lines = len(js_lines)
                     
                     # 对于每个匹配，显示上下文
-                    for match_idx, match in enumerate(matches):
+                    for match_idx, position in enumerate(matches):
                         # 计算匹配位置所在的行号
-                        line_number = js_content[:match.start()].count('\n') + 1
+                        line_number = js_content.count('\n', 0, position) + 1
                         
                         # 计算上下文的起始和结束行
                         start_line = max(1, line_number - context_lines)
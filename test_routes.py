@@ -1,34 +1,56 @@
-import requests
+import asyncio
+import time
+import aiohttp
 from urllib.parse import urljoin
-from collections import defaultdict
+from collections import Counter, defaultdict
+from operator import itemgetter
 import json
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import urllib3
 from tqdm import tqdm
 
-# 禁用SSL警告
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时退回标准库 json
+    orjson = None
 
 def load_routes(file_path):
     """加载路由文件"""
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def test_route(base_url, path):
+async def test_route(session, base_url, path):
     """测试单个路由"""
     url = urljoin(base_url.rstrip('/') + '/', path.lstrip('/'))
     try:
-        response = requests.get(url, timeout=10, verify=False)
-        content = response.content
-        # 去除可能影响长度计算的空白字符
-        content = content.strip()
-        return {
-            'url': url,
-            'status_code': response.status_code,
-            'content_length': int(response.headers.get('Content-Length', len(response.content))),
-            'response_time': response.elapsed.total_seconds()
-        }
+        # 先发送HEAD请求，只获取响应头，不下载响应体
+        start = time.perf_counter()
+        async with session.head(url, allow_redirects=True) as response:
+            response_time = time.perf_counter() - start
+            if response.status not in (405, 501) and 'Content-Length' in response.headers:
+                return {
+                    'url': url,
+                    'status_code': response.status,
+                    'content_length': int(response.headers['Content-Length']),
+                    'response_time': response_time
+                }
+
+        # 服务器不支持HEAD或未返回Content-Length时，退回GET请求
+        start = time.perf_counter()
+        async with session.get(url) as response:
+            response_time = time.perf_counter() - start
+            # 优先使用响应头中的长度，缺失时才读取响应体
+            content_length = response.content_length
+            if content_length is None:
+                content_length = len(await response.read())
+            return {
+                'url': url,
+                'status_code': response.status,
+                'content_length': content_length,
+                'response_time': response_time
+            }
     except Exception as e:
         return {
             'url': url,
@@ -38,26 +60,40 @@ def test_route(base_url, path):
             'error': str(e)
         }
 
+async def run_route_tests(base_url, paths):
+    """在同一个事件循环中并发测试所有路由，返回测试结果列表"""
+    # 共享连接池并关闭证书校验；超时只作用于套接字，不包含排队等待连接池的时间
+    connector = aiohttp.TCPConnector(limit=200, ssl=False)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=10)
+    results = []
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [test_route(session, base_url, path) for path in paths]
+        with tqdm(total=len(tasks), desc="测试进度", ncols=80) as pbar:
+            for future in asyncio.as_completed(tasks):
+                results.append(await future)
+                pbar.update(1)
+    return results
+
+def save_results(results, output_file):
+    """保存完整测试结果到文件"""
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
 def analyze_results(results):
     """分析测试结果，找出差异化页面和非404页面"""
-    # 记录每个响应长度出现的次数
-    length_count = defaultdict(int)
-    
     # 统计每个响应长度出现的次数
-    for result in results:
-        length_count[result['content_length']] += 1
+    length_count = Counter(map(itemgetter('content_length'), results))
     
-    # 找出独特的响应长度（只出现一次的长度）
+    # 找出独特的响应长度（出现1~5次的长度）
     unique_lengths = {length for length, count in length_count.items() if 1 <= count <= 5}
     
-    # 收集具有独特响应长度的页面
-    unique_pages = []
-    for result in results:
-        if result['content_length'] in unique_lengths:
-            unique_pages.append(result)
-    
-    # 按响应长度排序
-    unique_pages.sort(key=lambda x: x['content_length'])
+    # 收集具有独特响应长度的页面，并按响应长度排序
+    unique_pages = sorted((result for result in results if result['content_length'] in unique_lengths),
+                          key=itemgetter('content_length'))
     
     # 收集所有非404状态码的页面
     non_404_pages = defaultdict(list)
@@ -87,14 +123,7 @@ def main():
         if 'path' in route:
             all_paths.add(route['path'])
 
-    results = []
-    with tqdm(total=len(all_paths), desc="测试进度", ncols=80) as pbar:
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_path = {executor.submit(test_route, base_url, path): path for path in all_paths}
-            for future in as_completed(future_to_path):
-                result = future.result()
-                results.append(result)
-                pbar.update(1)
+    results = asyncio.run(run_route_tests(base_url, all_paths))
 
     # 分析结果并找出差异化页面
     unique_pages, non_404_pages = analyze_results(results)
@@ -121,8 +150,7 @@ def main():
         print('=' * 100)
 
     # 保存完整测试结果到文件
-    with open('route_test_results.json', 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    save_results(results, 'route_test_results.json')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file